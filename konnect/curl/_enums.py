@@ -4,26 +4,11 @@
 Enum classes for other modules
 """
 
-import enum
 from typing import Final
 
-import pycurl
 from kodo.quantities import QuantityUnit
 
 
-class SocketEvt(enum.Flag):
-	"""
-	Provides the `CURL_POLL_*` values from libcurl as a Python enum
-
-	Member names have the 'CURL_POLL_' portion of the name removed.
-	"""
-
-	IN = pycurl.POLL_IN
-	OUT = pycurl.POLL_OUT
-	INOUT = pycurl.POLL_INOUT
-	REMOVE = pycurl.POLL_REMOVE
-
-
 class Time(QuantityUnit):
 	"""
 	Units for time intervals
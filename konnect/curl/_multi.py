@@ -2,38 +2,21 @@
 
 from __future__ import annotations
 
-from collections.abc import AsyncIterator
-from collections.abc import Iterator
-from contextlib import asynccontextmanager
-from os import dup
-from socket import SO_PROTOCOL
-from socket import SO_TYPE
-from socket import SOL_SOCKET
-from socket import socket as Socket
-from typing import Final
-from typing import Literal
-from typing import Self
-from typing import TypeAlias
+from itertools import repeat
 from typing import TypeVar
 
 import anyio
 import pycurl
-from anyio.abc import ObjectReceiveStream
-from anyio.abc import ObjectSendStream
-from kodo.quantities import Quantity
-
-from ._enums import MILLISECONDS
-from ._enums import SECONDS
-from ._enums import SocketEvt
-from ._enums import Time
+from pycurl import E_OK
+from pycurl import POLL_REMOVE
+from pycurl import SOCKET_TIMEOUT
+
 from ._exceptions import CurlError
+from ._reactors import pick_reactor
 from .abc import RequestProtocol
 
 U = TypeVar("U")
 R = TypeVar("R")
-Event: TypeAlias = tuple[Literal[SocketEvt.IN, SocketEvt.OUT], Socket]
-
-INFO_READ_SIZE: Final = 10
 
 
 class Multi:
@@ -43,71 +26,98 @@ class Multi:
 	Users should treat this class as a black-box.  Only the `process()` method is available.
 	There are no other methods or attributes they should attempt to call or modify as doing
 	so will have undefined results.
+
+	Connections are shared by all the transfers an instance processes; the keyword arguments
+	tune how they are shared:
+
+	'max_host_connections' limits the number of connections to each host
+	(`CURLMOPT_MAX_HOST_CONNECTIONS`), and 'max_total_connections' limits the number of
+	connections overall (`CURLMOPT_MAX_TOTAL_CONNECTIONS`); zero (the default for both)
+	means no limit.  Transfers that would exceed a limit are queued until a connection is
+	available, and the time spent queued counts towards their timeouts.
+
+	'pipelining' is a bitmask of `CURLPIPE_*` values (`CURLMOPT_PIPELINING`).  With the
+	default of `CURLPIPE_MULTIPLEX` concurrent requests to the same HTTP/2 origin share
+	a single connection, with no additional connection setup or TLS handshakes.
 	"""
 
-	def __init__(self) -> None:
+	def __init__(
+		self,
+		*,
+		max_host_connections: int = 0,
+		max_total_connections: int = 0,
+		pipelining: int = pycurl.PIPE_MULTIPLEX,
+	) -> None:
 		self._handler = pycurl.CurlMulti()
 		self._handler.setopt(pycurl.M_SOCKETFUNCTION, self._add_socket_evt)
 		self._handler.setopt(pycurl.M_TIMERFUNCTION, self._add_timer_evt)
-		self._io_events = dict[int, tuple[Socket, SocketEvt]]()
-		self._deadline: Quantity[Time]|None = None
-		self._perform_cond = anyio.Condition()
+		self._handler.setopt(pycurl.M_MAX_HOST_CONNECTIONS, max_host_connections)
+		self._handler.setopt(pycurl.M_MAX_TOTAL_CONNECTIONS, max_total_connections)
+		self._handler.setopt(pycurl.M_PIPELINING, pipelining)
+		self._reactor = pick_reactor()
+		self._reactor_changes = dict[int, int]()
+		self._deadline: float|None = None
 		self._governor_delegated = False
+		self._waiters = dict[pycurl.Curl, tuple[RequestProtocol[object, object], anyio.Event]]()
 		self._completed = dict[pycurl.Curl, int]()
 		self._requests = dict[RequestProtocol[object, object], pycurl.Curl]()
 
-	def _add_socket_evt(self, what: int, socket: int, *_: object) -> None:
-		# Callback registered with CURLMOPT_SOCKETFUNCTION, registers socket events the
-		# transfer manager wants to be activated in response to.
-		what: SocketEvt = SocketEvt(what)
-		if what == SocketEvt.REMOVE:
-			assert socket in self._io_events, f"file descriptor {socket} not in events"
-			del self._io_events[socket]
-		elif socket in self._io_events:
-			socket_, __ = self._io_events[socket]
-			self._io_events[socket] = socket_, what
-		else:
-			self._io_events[socket] = _ExternalSocket.from_fd(socket), what
+	def _add_socket_evt(self, what: int, fd: int, *_: object) -> None:
+		# Callback registered with CURLMOPT_SOCKETFUNCTION; changes to sockets' events are
+		# batched until _update_reactor() passes them on, but removals are applied at once
+		# as libcurl closes the socket after this call returns.
+		if what == POLL_REMOVE:
+			self._reactor_changes.pop(fd, None)
+			if fd in self._reactor:
+				self._reactor.unregister(fd)
+			return
+		self._reactor_changes[fd] = what
+
+	def _update_reactor(self) -> None:
+		# Pass changes collected by _add_socket_evt() on to the reactor
+		for fd, what in self._reactor_changes.items():
+			if fd in self._reactor:
+				self._reactor.modify(fd, what)
+			else:
+				self._reactor.register(fd, what)
+		self._reactor_changes.clear()
 
 	def _add_timer_evt(self, delay: int) -> None:
 		# Callback registered with CURLMOPT_TIMERFUNCTION, registers when the transfer
 		# manager next wants to be activated if no prior events occur, in milliseconds.
-		self._deadline = \
-			None if delay < 0 else \
-			anyio.current_time() @ SECONDS + delay @ MILLISECONDS
+		# The deadline is kept as a plain float in seconds on the event loop's clock, ready
+		# to be compared with anyio.current_time() and passed to the reactor as-is.
+		self._deadline = None if delay < 0 else anyio.current_time() + delay / 1000
 
 	async def _single_event(self) -> int:
-		# Await a single event and call pycurl.CurlMulti.socket_action to inform the handler
-		# of it, then return the number of active transfers
+		# Await events and call pycurl.CurlMulti.socket_action to inform the handler of
+		# them, then return the number of active transfers
+
+		if self._reactor_changes:
+			self._update_reactor()
 
 		# Shortcut if no events are registered, or the only event is an immediate timeout
-		if not self._io_events and self._deadline is None:
-			_, running = self._handler.socket_action(pycurl.SOCKET_TIMEOUT, 0)
+		if not self._reactor and self._deadline is None:
+			_, running = self._handler.socket_action(SOCKET_TIMEOUT, 0)
 			return running
 
-		# Start concurrent tasks awaiting each of the registered events, await a response
-		# from the first task to wake and send one.
-		async with anyio.create_task_group() as tasks, _make_evt_channel() as (sendchan, recvchan):
-			for socket, evt in self._io_events.values():
-				if SocketEvt.IN in evt:
-					tasks.start_soon(_wait_readable, socket, sendchan)
-				if SocketEvt.OUT in evt:
-					tasks.start_soon(_wait_writable, socket, sendchan)
-			if self._deadline is not None:
-				tasks.start_soon(_wait_until, self._deadline, sendchan)
-			resp = await recvchan.receive()
-			tasks.cancel_scope.cancel()
-
-		# Call pycurl.CurlMulti.socket_action() with details of the received event, and
+		# Await any of the registered sockets being ready, or the deadline passing;
+		# whichever comes first.
+		ready = await self._reactor.wait(self._deadline)
+
+		# Call pycurl.CurlMulti.socket_action() with details of every ready socket in one
+		# pass, then for the timeout if it has expired or there were no ready sockets, and
 		# return how many active handles remain.
-		match resp:
-			case None:
-				self._deadline = None
-				_, running = self._handler.socket_action(pycurl.SOCKET_TIMEOUT, 0)
-			case SocketEvt.IN, Socket() as socket:
-				_, running = self._handler.socket_action(socket.fileno(), pycurl.CSELECT_IN)
-			case SocketEvt.OUT, Socket() as socket:
-				_, running = self._handler.socket_action(socket.fileno(), pycurl.CSELECT_OUT)  # type: ignore[unreachable]
+		socket_action = self._handler.socket_action
+		running = -1
+		for fd, mask in ready:
+			_, running = socket_action(fd, mask)
+		# Note that the deadline may have been updated by the above calls
+		if self._deadline is not None and self._deadline <= anyio.current_time():
+			self._deadline = None
+		elif running >= 0:
+			return running
+		_, running = socket_action(SOCKET_TIMEOUT, 0)
 		return running
 
 	def _get_handle(self, request: RequestProtocol[object, object]) -> pycurl.Curl:
@@ -123,39 +133,60 @@ class Multi:
 		handle = self._requests.pop(request)
 		self._handler.remove_handle(handle)
 
-	def _yield_complete(self) -> Iterator[tuple[pycurl.Curl, int]]:
-		# Convert pycurl.CurlMulti.info_read() output into tuples of (handle, code) and
-		# iteratively yield them
-		n_msgs = -1
-		while n_msgs:
-			n_msgs, complete, failed = self._handler.info_read(INFO_READ_SIZE)
-			yield from ((handle, pycurl.E_OK) for handle in complete)
-			yield from ((handle, res) for (handle, res, _) in failed)
+	def _drain_complete(self, running: int) -> list[pycurl.Curl]:
+		# Read all waiting completion messages from pycurl.CurlMulti.info_read(), store
+		# the handles with their result codes in _completed, and return the handles.
+		# Every added handle is either running, has a message waiting, or has already been
+		# stored; so given the number of running transfers the call is skipped when there
+		# can be no messages, and otherwise passing the number of waiting messages as
+		# "max_objects" reads them all in one call.
+		waiting = len(self._requests) - len(self._completed) - running
+		if waiting <= 0:
+			return []
+		_, complete, failed = self._handler.info_read(waiting)
+		self._completed.update(zip(complete, repeat(E_OK)))
+		self._completed.update((handle, res) for (handle, res, _) in failed)
+		complete.extend(handle for (handle, _, _) in failed)
+		return complete
 
 	async def _govern_transfer(self, request: RequestProtocol[U, R], handle: pycurl.Curl) -> None:
 		# Await _single_event() repeatedly until the wanted handle is completed.
-		# Store all intermediate completed handles and notify interested tasks.
+		# Store all intermediate completed handles and wake interested tasks.
 		remaining = -1
 		while remaining:
 			remaining = await self._single_event()
-			self._completed.update(self._yield_complete())
-			has_resp = request.has_update()
-			if not has_resp and not self._completed:
-				continue
-			async with self._perform_cond:
-				self._perform_cond.notify_all()
-				# This check needs to be atomic with the notification
-				# (more specifically, the _governor_delegated flag needs to be unset
-				# atomically)
-				if has_resp or handle in self._completed:
-					self._governor_delegated = False
-					return
+			completed = self._drain_complete(remaining)
+			if completed and self._waiters:
+				self._wake_waiters(completed)
+			if request.has_update() or handle in self._completed:
+				return
 
 		# SHOULD NOT fall off the end of the loop, but don't want it to run infinitely if
 		# something goes wrong, so ensure it has a completion condition and raise
 		# AssertionError if it does complete
 		raise AssertionError("no response detected after all handles processed")
 
+	def _wake_waiters(self, completed: list[pycurl.Curl]) -> None:
+		# Wake the waiting tasks of newly completed transfers.
+		# Waiting tasks with an interim update available are woken too, but are only
+		# checked for one when a transfer has completed; this is when every waiting task
+		# used to be woken to check for itself, and keeps ticks with no completions free
+		# of any per-waiter work.
+		for handle in completed:
+			if waiter := self._waiters.get(handle):
+				waiter[1].set()
+		for request, event in self._waiters.values():
+			if not event.is_set() and request.has_update():
+				event.set()
+
+	def _wake_successor(self) -> None:
+		# Wake a waiting task to take over governing the transfer manager; tasks which have
+		# already been woken are skipped as they may not need to take it
+		for _, event in self._waiters.values():
+			if not event.is_set():
+				event.set()
+				return
+
 	async def process(self, request: RequestProtocol[U, R]) -> U | R:
 		"""
 		Perform a request as described by a Curl instance
@@ -163,21 +194,46 @@ class Multi:
 		if request.has_update():
 			return request.get_update()
 		handle = self._get_handle(request)
-		while handle not in self._completed:
-			# If no task is governing the transfer manager, self-delegate the role to
-			# ourselves and govern transfers until `handle` completes.
-			if not self._governor_delegated:
-				self._governor_delegated = True
-				try:
-					await self._govern_transfer(request, handle)
-				finally:
-					self._governor_delegated = False
-			# Otherwise await a notification of completed handles
-			else:
-				async with self._perform_cond:
-					await self._perform_cond.wait()
-			if request.has_update():
-				return request.get_update()
+		# If no task is governing the transfer manager, give the handler a chance to
+		# complete the transfer immediately (for instance on an already connected socket,
+		# or with an early error) before resorting to awaiting events.
+		if not self._governor_delegated:
+			_, running = self._handler.socket_action(SOCKET_TIMEOUT, 0)
+			completed = self._drain_complete(running)
+			# Other transfers may have completed too, and their tasks may be waiting (for
+			# instance while the governor role is being handed over)
+			if completed and self._waiters:
+				self._wake_waiters(completed)
+		try:
+			while handle not in self._completed:
+				# If no task is governing the transfer manager, self-delegate the role to
+				# ourselves and govern transfers until `handle` completes.
+				# With a single request in flight this is the only path taken: the governor
+				# never has waiters to wake or a successor to pass the role on to, so the
+				# cost over driving the handler directly is a flag and a few empty checks.
+				# The flag is still needed in case another request starts meanwhile.
+				if not self._governor_delegated:
+					self._governor_delegated = True
+					try:
+						await self._govern_transfer(request, handle)
+					finally:
+						self._governor_delegated = False
+				# Otherwise await being woken by the governor, either because `handle` has
+				# completed or has an update, or to take over the governor role.
+				else:
+					event = anyio.Event()
+					self._waiters[handle] = request, event
+					try:
+						await event.wait()
+					finally:
+						del self._waiters[handle]
+				if request.has_update():
+					return request.get_update()
+		finally:
+			# If the governor role is vacant when leaving, pass it on to a waiting task (if
+			# there are any; usually there are none when only one request is in flight)
+			if self._waiters and not self._governor_delegated:
+				self._wake_successor()
 		match self._completed.pop(handle):  # noqa: R503
 			case pycurl.E_OK:
 				self._del_handle(request)
@@ -186,51 +242,3 @@ class Multi:
 				assert isinstance(err, int)  # nudge mypy
 				self._del_handle(request)
 				raise CurlError(err, handle.errstr())
-
-
-class _ExternalSocket(Socket):
-	"""
-	A non-closing socket.socket subclass
-
-	When instances are garbage-collected they do not close the underlying file descriptor.
-	Used for sockets managed in a third-party library (libcurl in this case) which are
-	passed as file descriptors.  The file descriptor MUST match, so duplication is not
-	a possibility
-	"""
-
-	def __del__(self) -> None:
-		return
-
-	@classmethod
-	def from_fd(cls, fd: int, /) -> Self:
-		"""
-		Create an instance from the file descriptor of an open socket
-		"""
-		# Create a temporary socket instance to get socket type and protocol (no low level
-		# getsockopt()). FD must be duplicated as it will be closed when destroyed.
-		socket = Socket(fileno=dup(fd))
-		stype = socket.getsockopt(SOL_SOCKET, SO_TYPE)
-		proto = socket.getsockopt(SOL_SOCKET, SO_PROTOCOL)
-		return cls(socket.family, stype, proto, fd)
-
-
-@asynccontextmanager
-async def _make_evt_channel() -> AsyncIterator[tuple[ObjectSendStream[Event|None], ObjectReceiveStream[Event|None]]]:
-	send, recv = anyio.create_memory_object_stream[Event|None](1)
-	async with send, recv:
-		yield send, recv
-
-
-async def _wait_readable(socket: Socket, channel: ObjectSendStream[Event]) -> None:
-	await anyio.wait_socket_readable(socket)
-	await channel.send((SocketEvt.IN, socket))
-
-
-async def _wait_writable(socket: Socket, channel: ObjectSendStream[Event]) -> None:
-	await anyio.wait_socket_writable(socket)
-	await channel.send((SocketEvt.OUT, socket))
-
-
-async def _wait_until(time: Quantity[Time], channel: ObjectSendStream[None]) -> None:
-	await anyio.sleep_until(time >> SECONDS)
-	await channel.send(None)
@@ -0,0 +1,323 @@
+# Copyright 2023-2024  Dom Sekotill <dom.sekotill@kodo.org.uk>
+
+"""
+Socket readiness notification backends ("reactors") used by `Multi`
+
+The best backend the platform supports is chosen at runtime by `pick_reactor()`.
+"""
+
+from __future__ import annotations
+
+import select
+import sys
+from abc import ABC
+from abc import abstractmethod
+from array import array
+from collections.abc import Awaitable
+from collections.abc import Callable
+from math import inf
+from typing import Final
+from typing import Protocol
+from typing import TypeAlias
+
+import anyio
+import anyio.lowlevel
+from pycurl import CSELECT_IN
+from pycurl import CSELECT_OUT
+from pycurl import POLL_IN
+from pycurl import POLL_OUT
+
+if sys.platform == "linux":
+	from pycurl import CSELECT_ERR
+	from pycurl import POLL_INOUT
+	from pycurl import POLL_NONE
+
+Ready: TypeAlias = list[tuple[int, int]]
+
+if sys.platform == "linux":
+	# Map CURL_POLL_* values to epoll event masks
+	EPOLL_MASKS: Final = {
+		POLL_NONE: 0,
+		POLL_IN: select.EPOLLIN,
+		POLL_OUT: select.EPOLLOUT,
+		POLL_INOUT: select.EPOLLIN|select.EPOLLOUT,
+	}
+
+	# Map the epoll events of interest to CURL_CSELECT_* values, for every combination of
+	# them
+	EPOLL_REPORTED: Final = select.EPOLLIN|select.EPOLLOUT|select.EPOLLERR|select.EPOLLHUP
+	EPOLL_CSELECT: Final = {
+		events: (
+			(CSELECT_IN if events & (select.EPOLLIN|select.EPOLLHUP) else 0) |
+			(CSELECT_OUT if events & select.EPOLLOUT else 0) |
+			(CSELECT_ERR if events & select.EPOLLERR else 0)
+		)
+		for events in range(EPOLL_REPORTED + 1)
+		if not events & ~EPOLL_REPORTED
+	}
+
+if sys.platform != "linux" and sys.platform != "win32":
+	# Pair CURL_POLL_* flags with kqueue filters; not every platform in this group has
+	# kqueue, in which case pick_reactor() never picks KqueueReactor
+	KQUEUE_FILTERS: Final = (
+		(POLL_IN, select.KQ_FILTER_READ),
+		(POLL_OUT, select.KQ_FILTER_WRITE),
+	) if hasattr(select, "kqueue") else ()
+
+
+class Reactor(Protocol):
+	"""
+	The interface of socket readiness notification backends
+
+	Events are registered as `CURL_POLL_*` values (excluding `CURL_POLL_REMOVE`) and ready
+	sockets are reported with `CURL_CSELECT_*` values, ready to be passed on to
+	`pycurl.CurlMulti.socket_action()`.
+	"""
+
+	def __len__(self) -> int: ...
+
+	def __contains__(self, fd: object, /) -> bool: ...
+
+	def register(self, fd: int, events: int, /) -> None:
+		"""
+		Start reporting the given events for a file descriptor
+		"""
+		...
+
+	def modify(self, fd: int, events: int, /) -> None:
+		"""
+		Change the events reported for a registered file descriptor
+		"""
+		...
+
+	def unregister(self, fd: int, /) -> None:
+		"""
+		Stop reporting events for a registered file descriptor
+		"""
+		...
+
+	async def wait(self, deadline: float|None, /) -> Ready:
+		"""
+		Await and return ready file descriptors, or an empty list once the deadline passes
+		"""
+		...
+
+
+class _PollableReactor(ABC):
+	# Base class for reactors built on a kernel object which itself becomes readable when
+	# any of the file descriptors registered with it are ready
+
+	@abstractmethod
+	def __len__(self) -> int: ...
+
+	@abstractmethod
+	def fileno(self) -> int: ...
+
+	@abstractmethod
+	def poll(self) -> Ready: ...
+
+	async def wait(self, deadline: float|None, /) -> Ready:
+		# If any file descriptors are already ready, skip awaiting the reactor (registering
+		# it with, and removing it from, the event loop) and use a checkpoint to let other
+		# tasks run.
+		if ready := self.poll():
+			await anyio.lowlevel.checkpoint()
+			return ready
+		# A cancel scope is only needed (and allocated) when there is a deadline
+		if deadline is None:
+			await anyio.wait_readable(self.fileno())
+		elif self:
+			with anyio.CancelScope(deadline=deadline):
+				await anyio.wait_readable(self.fileno())
+		else:
+			await anyio.sleep_until(deadline)
+		return self.poll()
+
+
+if sys.platform == "linux":
+	class EpollReactor(_PollableReactor):
+		"""
+		A reactor for Linux, using `epoll`
+		"""
+
+		def __init__(self) -> None:
+			self._epoll = select.epoll()
+			self._events = dict[int, int]()
+
+		def __len__(self) -> int:
+			return len(self._events)
+
+		def __contains__(self, fd: object, /) -> bool:
+			return fd in self._events
+
+		def fileno(self) -> int:
+			return self._epoll.fileno()
+
+		def register(self, fd: int, events: int, /) -> None:
+			self._epoll.register(fd, EPOLL_MASKS[events])
+			self._events[fd] = events
+
+		def modify(self, fd: int, events: int, /) -> None:
+			if self._events[fd] != events:
+				self._epoll.modify(fd, EPOLL_MASKS[events])
+				self._events[fd] = events
+
+		def unregister(self, fd: int, /) -> None:
+			del self._events[fd]
+			self._epoll.unregister(fd)
+
+		def poll(self) -> Ready:
+			return [(fd, EPOLL_CSELECT[events & EPOLL_REPORTED]) for fd, events in self._epoll.poll(0)]
+
+if sys.platform != "linux" and sys.platform != "win32":
+	class KqueueReactor(_PollableReactor):
+		"""
+		A reactor for BSD derived platforms (including macOS), using `kqueue`
+		"""
+
+		def __init__(self) -> None:
+			self._kqueue = select.kqueue()
+			self._events = dict[int, int]()
+
+		def __len__(self) -> int:
+			return len(self._events)
+
+		def __contains__(self, fd: object, /) -> bool:
+			return fd in self._events
+
+		def fileno(self) -> int:
+			return self._kqueue.fileno()
+
+		def register(self, fd: int, events: int, /) -> None:
+			self._control(fd, 0, events)
+			self._events[fd] = events
+
+		def modify(self, fd: int, events: int, /) -> None:
+			if (current := self._events[fd]) != events:
+				self._control(fd, current, events)
+				self._events[fd] = events
+
+		def unregister(self, fd: int, /) -> None:
+			self._control(fd, self._events.pop(fd), 0)
+
+		def _control(self, fd: int, current: int, events: int) -> None:
+			# Add and delete read/write filters according to the change in events, submitting
+			# all changes in a single call
+			changes = [
+				select.kevent(fd, kfilter, select.KQ_EV_ADD if events & flag else select.KQ_EV_DELETE)
+				for flag, kfilter in KQUEUE_FILTERS
+				if (current ^ events) & flag
+			]
+			if changes:
+				self._kqueue.control(changes, 0, 0)
+
+		def poll(self) -> Ready:
+			# Read and write readiness are reported as separate kevents; combine them
+			ready = dict[int, int]()
+			for kev in self._kqueue.control(None, 2 * len(self._events) or 1, 0):
+				mask = CSELECT_IN if kev.filter == select.KQ_FILTER_READ else CSELECT_OUT
+				ready[kev.ident] = ready.get(kev.ident, 0) | mask
+			return list(ready.items())
+
+
+class SelectReactor:
+	"""
+	A fallback reactor for other platforms, using `select` and per-socket waits
+	"""
+
+	def __init__(self) -> None:
+		self._events = dict[int, int]()
+		self._readers = _DescriptorArray()
+		self._writers = _DescriptorArray()
+
+	def __len__(self) -> int:
+		return len(self._events)
+
+	def __contains__(self, fd: object, /) -> bool:
+		return fd in self._events
+
+	def register(self, fd: int, events: int, /) -> None:
+		self.modify(fd, events)
+
+	def modify(self, fd: int, events: int, /) -> None:
+		self._events[fd] = events
+		if events & POLL_IN:
+			self._readers.add(fd)
+		else:
+			self._readers.discard(fd)
+		if events & POLL_OUT:
+			self._writers.add(fd)
+		else:
+			self._writers.discard(fd)
+
+	def unregister(self, fd: int, /) -> None:
+		del self._events[fd]
+		self._readers.discard(fd)
+		self._writers.discard(fd)
+
+	def poll(self) -> Ready:
+		if not self._events:
+			return []
+		readable, writable, _ = select.select(self._readers.fds, self._writers.fds, [], 0)
+		ready = dict.fromkeys(readable, CSELECT_IN)
+		for fd in writable:
+			ready[fd] = ready.get(fd, 0) | CSELECT_OUT
+		return list(ready.items())
+
+	async def wait(self, deadline: float|None, /) -> Ready:
+		if ready := self.poll():
+			await anyio.lowlevel.checkpoint()
+			return ready
+		# There is no single object to await, so start a task per event and stop them all
+		# as soon as one wakes.
+		with anyio.CancelScope(deadline=inf if deadline is None else deadline) as scope:
+			async with anyio.create_task_group() as tasks:
+				for fd in self._readers.fds:
+					tasks.start_soon(_wake, anyio.wait_readable, fd, scope)
+				for fd in self._writers.fds:
+					tasks.start_soon(_wake, anyio.wait_writable, fd, scope)
+				if not self._events:
+					await anyio.sleep_forever()
+		return self.poll()
+
+
+class _DescriptorArray:
+	# A set of file descriptors kept in a contiguous array, which can be passed to
+	# select.select() or iterated over without filtering a mapping of events on each call.
+	# Removal moves the last item into the vacated slot, tracked with an index mapping.
+
+	def __init__(self) -> None:
+		self.fds = array("i")
+		self._index = dict[int, int]()
+
+	def add(self, fd: int) -> None:
+		if fd not in self._index:
+			self._index[fd] = len(self.fds)
+			self.fds.append(fd)
+
+	def discard(self, fd: int) -> None:
+		if (index := self._index.pop(fd, None)) is None:
+			return
+		last = self.fds.pop()
+		if last != fd:
+			self.fds[index] = last
+			self._index[last] = index
+
+
+def pick_reactor() -> Reactor:
+	"""
+	Return a new instance of the best reactor available on the current platform
+	"""
+	reactor: Reactor
+	if sys.platform == "linux":
+		reactor = EpollReactor()
+	elif sys.platform != "win32" and hasattr(select, "kqueue"):
+		reactor = KqueueReactor()
+	else:
+		reactor = SelectReactor()
+	return reactor
+
+
+async def _wake(wait: Callable[[int], Awaitable[None]], fd: int, scope: anyio.CancelScope) -> None:
+	await wait(fd)
+	scope.cancel()
@@ -7,8 +7,8 @@ Script for generating stub packages from konnect.curl source code
 """
 
 import sys
-from collections.abc import Iterator
-from copy import deepcopy
+import tomllib
+from functools import cached_property
 from pathlib import Path
 from shutil import copyfile
 from shutil import rmtree
@@ -20,31 +20,37 @@ import toml
 
 CWD = Path(".")
 
-POETRY_CONFIG = {
-	"name": "types-konnect.curl",
-	"version": "",
-	"description": "static type stubs for konnect.curl",
-	"packages": [
-		{"include": "konnect-stubs"},
-	],
-	"authors": [],
-	"dependencies": {},
-	"include": [
-		"LICENCE.txt",
-	],
-	"license": "MPL-2.0",
-}
-
-STUB_PKG_CONFIG = {
-	"build-system": {
-		"build-backend": "poetry.core.masonry.api",
-		"requires": ["poetry_core>=1.0.0"],
-	},
-	"tool": {"poetry": POETRY_CONFIG},
-}
+Config: TypeAlias = dict[str, object]
 
 
-Config: TypeAlias = dict[str, object]
+def new_stub_config() -> Config:
+	"""
+	Return a new, incomplete, configuration mapping for the stubs package
+
+	Each call constructs new objects, so the returned mapping can be modified freely.
+	"""
+	return {
+		"build-system": {
+			"build-backend": "poetry.core.masonry.api",
+			"requires": ["poetry_core>=1.0.0"],
+		},
+		"tool": {
+			"poetry": {
+				"name": "types-konnect.curl",
+				"version": "",
+				"description": "static type stubs for konnect.curl",
+				"packages": [
+					{"include": "konnect-stubs"},
+				],
+				"authors": [],
+				"dependencies": {},
+				"include": [
+					"LICENCE.txt",
+				],
+				"license": "MPL-2.0",
+			},
+		},
+	}
 
 
 def get_object(config: Config, *path: str|int) -> object:
@@ -132,38 +138,47 @@ class Project:
 
 	def __init__(self, root: Path = CWD):
 		self.root = root
-		self._config: Config|None = None
 
-	@property
+	@cached_property
 	def config(self) -> Config:
 		"""
 		The project configuration (pyproject.toml) as a configuration mapping
 		"""
-		if not self._config:
-			with open("pyproject.toml") as config:
-				self._config = toml.load(config)
-		return self._config
+		with open(self.root / "pyproject.toml", "rb") as config:
+			return tomllib.load(config)
 
-	def get_version(self) -> str:
+	@cached_property
+	def metadata(self) -> Config:
 		"""
-		Return the project's version
+		The project metadata table ("project") from the project configuration
 		"""
-		return get_str(self.config, "project", "version")
+		return get_config(self.config, "project")
 
-	def get_authors(self) -> Iterator[str]:
+	@cached_property
+	def version(self) -> str:
 		"""
-		Return an iterator over the project authors objects
+		The project's version
 		"""
-		for author in get_array(self.config, "project", "authors"):
+		return get_str(self.metadata, "version")
+
+	@cached_property
+	def authors(self) -> list[str]:
+		"""
+		The project's authors, formatted as "name <email>" strings
+		"""
+		authors = []
+		for author in get_array(self.metadata, "authors"):
 			if not isinstance(author, dict):
 				raise TypeError(f"Not an author mapping: {author!r}")
-			yield f"{author['name']} <{author['email']}>"
+			authors.append(f"{author['name']} <{author['email']}>")
+		return authors
 
+	@cached_property
 	def python_dependency(self) -> str:
 		"""
-		Return the python dependency specification for the project
+		The python dependency specification for the project
 		"""
-		return get_str(self.config, "project", "requires-python")
+		return get_str(self.metadata, "requires-python")
 
 
 class Package:
@@ -178,13 +193,13 @@ class Package:
 		"""
 		Return the package's configuration (pyproject.toml) as a mapping
 		"""
-		config = deepcopy(STUB_PKG_CONFIG)
+		config = new_stub_config()
 		poetry = get_config(config, "tool", "poetry")
 		assert isinstance(poetry["authors"], list)
 		assert isinstance(poetry["dependencies"], dict)
-		poetry["version"] = self.project.get_version()
-		poetry["authors"].extend(self.project.get_authors())
-		poetry["dependencies"].update(python=self.project.python_dependency())
+		poetry["version"] = self.project.version
+		poetry["authors"].extend(self.project.authors)
+		poetry["dependencies"].update(python=self.project.python_dependency)
 		return config
 
 	def build(self, build_dir: Path) -> None:
@@ -198,7 +213,7 @@ class Package:
 			toml.dump(self.complete_config(), config)
 		self.copy_docs(build_dir)
 		with Environment(build_dir / "stub.venv") as env:
-			self.make_stubs(build_dir, env)
+			self.make_stubs(build_dir / "konnect-stubs", env)
 			self.build_package(build_dir, env)
 
 	def copy_docs(self, build_dir: Path) -> None:
@@ -207,25 +222,21 @@ class Package:
 		"""
 		copyfile(self.project.root / "LICENCE.txt", build_dir / "LICENCE.txt")
 
-	def make_stubs(self, build_dir: Path, env: Environment) -> None:
+	def make_stubs(self, stubs_dir: Path, env: Environment) -> None:
 		"""
-		Generate type stub package
+		Generate type stub package in stubs_dir
 		"""
+		source_dir = self.project.root / "konnect/curl"
 		env.install("mypy")
 		env.run(
 			"stubgen",
 			"--verbose",
-			"--output", build_dir / "konnect-stubs",
-			self.project.root / "konnect/curl",
-		)
-		copyfile(
-			self.project.root / "konnect/curl/__init__.py",
-			build_dir / "konnect-stubs/curl/__init__.pyi",
-		)
-		copyfile(
-			self.project.root / "konnect/curl/_enums.py",
-			build_dir / "konnect-stubs/curl/_enums.pyi",
+			"--output", stubs_dir,
+			source_dir,
 		)
+		# Some modules are used verbatim as their own stubs
+		for name in "__init__", "_enums":
+			copyfile(source_dir / f"{name}.py", stubs_dir / f"curl/{name}.pyi")
 
 	def build_package(self, build_dir: Path, env: Environment) -> None:
 		"""